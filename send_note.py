@@ -1,28 +1,114 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-send_note.py — send a single MIDI note name to MIDISock via UNIX socket
+send_note.py — send MIDI note name(s) to MIDISock via UNIX socket
+- Multiple notes are sent as one line over a single connection
+- $MIDISOCK_FD: send on an already-connected socket FD (kept open for reuse)
+- Sends one datagram; falls back to a stream connection for `server.py --stream`
 - Prints result to STDOUT: "OK" / "ERR: ..." / "SENT" (no ACK from server)
 - No extra deps (standard library only)
 """
 
 import os
 import sys
+import errno
 import socket
 
 # --- constants ---
-SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+# abspath is string-only; resolve (realpath) only when this file itself is a symlink
+_HERE = os.path.abspath(__file__)
+SCRIPT_DIR = os.path.dirname(os.path.realpath(_HERE) if os.path.islink(_HERE) else _HERE)
 SOCK_PATH  = os.path.join(SCRIPT_DIR, "midi_trigger.sock")
 CONNECT_TIMEOUT = 0.5   # seconds
 REPLY_TIMEOUT   = 0.4   # seconds (for optional server ACK)
+DRAIN_TIMEOUT   = 0.01  # seconds (per read while draining before close)
+# sendto errnos meaning the server was reached but the datagram not queued
+SEND_ERRNOS     = {errno.ENOBUFS, errno.EMSGSIZE, errno.EAGAIN, errno.EWOULDBLOCK}
+MAX_LINE        = 1024  # bytes incl. newline (server.py drops longer input)
+
+def _drain_and_close(s: socket.socket):
+    """Half-close, read until EOF/quiet, then close (unread data would cause a reset)."""
+    try:
+        s.shutdown(socket.SHUT_WR)
+    except Exception:
+        pass
+    try:
+        s.settimeout(DRAIN_TIMEOUT)
+        while s.recv(4096):
+            pass
+    except Exception:
+        pass
+    try:
+        s.close()
+    except Exception:
+        pass
+
+def _send_via_fd(fd: str, data: bytes):
+    """Send one encoded line on an inherited, already-connected socket; never close it."""
+    try:
+        s = socket.socket(fileno=int(fd))
+    except Exception as e:
+        print(f"ERR: invalid MIDISOCK_FD ({e.__class__.__name__})")
+        sys.exit(2)
+    try:
+        s.sendall(data)
+    except Exception as e:
+        print(f"ERR: send failed ({e.__class__.__name__})")
+        sys.exit(3)
+    finally:
+        s.detach()  # the parent owns the connection
+    print("SENT")
+    sys.exit(0)
+
+def _send_dgram(data: bytes) -> bool:
+    """
+    Send one encoded line as a datagram.
+    Returns True if sent, False if the server is a SOCK_STREAM (legacy) one;
+    exits on other errors (2 = socket unreachable, 3 = send failed).
+    """
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    s.settimeout(CONNECT_TIMEOUT)
+    try:
+        s.sendto(data, SOCK_PATH)
+    except OSError as e:
+        if e.errno == errno.EPROTOTYPE:
+            return False
+        if isinstance(e, TimeoutError) or e.errno in SEND_ERRNOS:
+            print(f"ERR: send failed ({e.__class__.__name__})")
+            sys.exit(3)
+        # Missing/refused/permission/path too long: same as a failed connect
+        print(f"ERR: connect failed ({e.__class__.__name__})")
+        sys.exit(2)
+    finally:
+        s.close()
+    return True
 
 def main():
     if len(sys.argv) < 2:
         # Print usage on STDOUT to keep output in one stream as requested
-        print('ERR: usage: send_note.py "C#4"')
+        print('ERR: usage: send_note.py "C#4" ["E4" ...]')
         sys.exit(1)
 
-    note = sys.argv[1]
+    note = " ".join(sys.argv[1:])
+    # Encode once; every send path below uses these exact bytes
+    try:
+        data = (note + "\n").encode("utf-8", "strict")
+    except UnicodeError as e:
+        print(f"ERR: send failed ({e.__class__.__name__})")
+        sys.exit(3)
+    if len(data) > MAX_LINE:
+        print(f"ERR: line too long ({len(data)} > {MAX_LINE} bytes)")
+        sys.exit(1)
+
+    # Reuse a connection held open by the parent (no connect/close per call)
+    fd = os.environ.get("MIDISOCK_FD")
+    if fd:
+        _send_via_fd(fd, data)
+
+    # Datagram first (default server); otherwise continue with a stream connection
+    if _send_dgram(data):
+        print("SENT")
+        sys.exit(0)
 
     # Create and connect
     s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
@@ -31,25 +117,19 @@ def main():
         s.connect(SOCK_PATH)
     except Exception as e:
         print(f"ERR: connect failed ({e.__class__.__name__})")
-        try:
-            s.close()
-        except Exception:
-            pass
+        _drain_and_close(s)
         sys.exit(2)
 
-    # Send note (one line) and half-close write side
+    # Send note(s) (one line) and half-close write side
     try:
-        s.sendall((note + "\n").encode("utf-8", "strict"))
+        s.sendall(data)
         try:
             s.shutdown(socket.SHUT_WR)
         except Exception:
             pass
     except Exception as e:
         print(f"ERR: send failed ({e.__class__.__name__})")
-        try:
-            s.close()
-        except Exception:
-            pass
+        _drain_and_close(s)
         sys.exit(3)
 
     # Try to read one-line reply (OK/ERR) — compatible with current server (no reply)
@@ -59,23 +139,14 @@ def main():
     except socket.timeout:
         # No ACK from server (current design) — treat as best-effort success
         print("SENT")
-        try:
-            s.close()
-        except Exception:
-            pass
+        _drain_and_close(s)
         sys.exit(0)
     except Exception as e:
         print(f"ERR: recv failed ({e.__class__.__name__})")
-        try:
-            s.close()
-        except Exception:
-            pass
+        _drain_and_close(s)
         sys.exit(4)
 
-    try:
-        s.close()
-    except Exception:
-        pass
+    _drain_and_close(s)
 
     line = (data or b"").decode("utf-8", "ignore").strip()
     if not line:
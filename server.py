@@ -4,27 +4,34 @@
 MIDISock — macOS single-note MIDI relay.
 
 Reads `config.yaml` and opens exactly one MIDI OUT (name or regex).
-Runs a UNIX socket `midi_trigger.sock`; each connection sends ONE note
-(e.g., "C#4") as a short Note On/Off on the configured channel.
+Runs a UNIX datagram socket `midi_trigger.sock`; each message carries a line
+of note names or numbers (e.g., "C#4", "C4 E4 G4", "61") sent as short Note
+On/Off pulses on the configured channel.
 
 `--list`  : print available (healed) MIDI OUT port names and exit.
 `--check` : validate config and print selected port/channel, then exit.
+`--stream`: serve SOCK_STREAM instead of SOCK_DGRAM (legacy clients).
 
 Logs to STDERR (enable debug with MIDISOCK_DEBUG=1).
-Prevents duplicate instances via socket probe.
+Prevents duplicate instances via a lockfile (socket probe as fallback).
 
 Dependencies: python-rtmidi, rumps, PyYAML
 """
 
 import os
 import sys
+import errno
 import re
+import heapq
+import pickle
+import functools
 import time
 import socket
+import selectors
 import threading
 import unicodedata
 
-import rumps  # ← 機能は据え置き。rtmidi / yaml は遅延 import に変更
+# rumps / rtmidi / yaml は遅延 import（--list / --check では PyObjC を読み込まない）
 
 # ---------- UTF-8 stdio (robust under non-UTF locales) ----------
 try:
@@ -34,9 +41,13 @@ except Exception:
     pass
 
 # ---------- Paths ----------
-SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+# abspath is string-only; resolve (realpath) only when this file itself is a symlink
+_HERE = os.path.abspath(__file__)
+SCRIPT_DIR = os.path.dirname(os.path.realpath(_HERE) if os.path.islink(_HERE) else _HERE)
 SOCK_PATH = os.path.join(SCRIPT_DIR, "midi_trigger.sock")
+LOCK_PATH = SOCK_PATH + ".lock"            # flock held for the process lifetime
 CONFIG_PATH = os.path.join(SCRIPT_DIR, "config.yaml")
+CONFIG_CACHE_PATH = CONFIG_PATH + ".pkl"   # parsed config, keyed by mtime+size
 
 # ---------- Unified logging ----------
 def _log(level: str, msg: str):
@@ -53,24 +64,61 @@ def _warn(msg: str):  _log("WARN",  msg)
 def _error(msg: str): _log("ERROR", msg)
 
 _DEBUG = bool(os.environ.get("MIDISOCK_DEBUG"))
-def _debug(msg: str):
-    if _DEBUG:
-        _log("DEBUG", msg)
+if _DEBUG:
+    def _debug(msg: str): _log("DEBUG", msg)
+else:
+    def _debug(msg: str): pass
 
 # Backward-compat shim (just in case any old calls remain)
 def _stderr(msg: str):
     _error(msg)
 
-# ---------- Note map (C-1 .. G9, sharps only) ----------
+# ---------- Note names (C-1 .. G9, sharps only) ----------
 _NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-NOTE_TO_NUM = {f"{_NOTE_NAMES[n % 12]}{(n // 12) - 1}": n for n in range(128)}
+
+# Hot path: parse "<pitch class><octave>" and compute the number directly
+_NOTE_RE = re.compile(r"([A-G])(#?)(-1|[0-9])")
+_PC = {name: i for i, name in enumerate(_NOTE_NAMES)}
+_TOK_RE = re.compile(r"[,\s]+")  # note separators (only used when commas appear)
+
+def _note_number(note_name: str) -> int | None:
+    """MIDI note number for a strict note name (e.g. "C#4") or number ("61" / "#61"), or None."""
+    # Numeric form: 0..127, optionally prefixed with '#' (no name parsing)
+    c = note_name[:1]
+    if c == "#" or "0" <= c <= "9":
+        num = note_name[1:] if c == "#" else note_name
+        if num.isascii() and num.isdigit():
+            n = int(num)
+            return n if n <= 127 else None
+        return None
+
+    m = _NOTE_RE.fullmatch(note_name)
+    if m is None:
+        return None
+    pc = _PC.get(m.group(1) + m.group(2))  # E# / B# are not valid names
+    if pc is None:
+        return None
+    n = pc + (int(m.group(3)) + 1) * 12
+    return n if n <= 127 else None
 
 # ---------- Globals ----------
 _MIDIOUT = None           # rtmidi.MidiOut (opened)
 _STATUS_ON = 0x90         # set by channel
 _STATUS_OFF = 0x80        # set by channel
+_NOTE_ON_MSG: list[bytes] = []   # per-note 3-byte messages, built by channel
+_NOTE_OFF_MSG: list[bytes] = []
+_GATE_SEC = 0.05          # Note On → Note Off
+_MAX_LINE = 1024          # bytes; longer input is dropped (send_note.py enforces the same)
+_SOCK_TYPE = socket.SOCK_DGRAM  # SOCK_STREAM with `--stream` (legacy clients)
+_LOCK_FD: int | None = None  # instance lock (never closed; released on exit)
+
+# Deferred Note Offs: heap of (due monotonic time, note)
+_OFF_HEAP: list[tuple[float, int]] = []
+_OFF_LOCK = threading.Lock()
+_OFF_WAKE = threading.Event()
 
 # ---------- Utilities ----------
+@functools.lru_cache(maxsize=256)
 def _norm(s: str) -> str:
     """NFKC + casefold for language-agnostic matching."""
     return unicodedata.normalize("NFKC", s).casefold()
@@ -81,15 +129,62 @@ def _list_ports() -> list[str]:
     m = rtmidi.MidiOut()
     return m.get_ports()
 
+# Port list enumerated on a thread while config.yaml loads (see _prefetch_ports)
+_PORTS_THREAD: threading.Thread | None = None
+_PORTS_CACHE: list[str] | None = None
+
+def _prefetch_ports():
+    """Start enumerating MIDI ports in the background (overlaps config I/O)."""
+    global _PORTS_THREAD
+
+    def run():
+        global _PORTS_CACHE
+        try:
+            _PORTS_CACHE = _list_ports()
+        except Exception as e:
+            _debug(f"Port prefetch failed: {e}")  # _ports() enumerates again
+
+    _PORTS_THREAD = threading.Thread(target=run, daemon=True)
+    _PORTS_THREAD.start()
+
+def _ports() -> list[str]:
+    """Prefetched port list if available (joins the thread), else enumerate now."""
+    if _PORTS_THREAD is not None:
+        _PORTS_THREAD.join()
+        if _PORTS_CACHE is not None:
+            return _PORTS_CACHE
+    return _list_ports()
+
 # ---- Mojibake healing (display only; no extra deps) ----
-_BAD_HINTS = {"Â", "Ã", "Ä", "Å", "æ", "ð", "ø", "þ", "�", "„", "É", "ê", "Ç", "π"}
+_BAD_RE = re.compile(r"[ÂÃÄÅæðøþ�„ÉêÇπ]")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]")  # Kana + CJK ideographs
+
+def _byte_table(enc: str) -> dict[int, str]:
+    """
+    str.translate table mapping each char of an 8-bit codec to its byte as a
+    latin-1 char, so `s.translate(t).encode("latin-1")` == `s.encode(enc)`.
+    Latin-1-range chars the codec lacks map to U+FFFD (encode fails, as strict).
+    """
+    table = {}
+    for b in range(0x80, 0x100):
+        try:
+            table[ord(bytes([b]).decode(enc))] = chr(b)
+        except UnicodeDecodeError:
+            pass
+    for c in range(0x80, 0x100):
+        table.setdefault(c, "\ufffd")
+    return table
+
+# Built once at import; None = latin-1 (identity)
+_MOJIBAKE_TABLES = (_byte_table("cp1252"), _byte_table("mac_roman"), None)
 
-def _variants_from_mojibake(s: str) -> list[str]:
+@functools.lru_cache(maxsize=256)
+def _variants_from_mojibake(s: str) -> tuple[str, ...]:
     """Return candidate 'fixed' variants of a mis-decoded UTF-8 string."""
     out = []
-    for enc in ("cp1252", "mac_roman", "latin-1"):
+    for table in _MOJIBAKE_TABLES:
         try:
-            b = s.encode(enc, errors="strict")
+            b = (s.translate(table) if table else s).encode("latin-1", errors="strict")
             cand = b.decode("utf-8", errors="strict")
             if cand != s:
                 out.append(cand)
@@ -100,11 +195,13 @@ def _variants_from_mojibake(s: str) -> list[str]:
     for v in out:
         if v not in seen:
             seen.add(v); uniq.append(v)
-    return uniq
+    return tuple(uniq)  # immutable: shared via the cache
 
+@functools.lru_cache(maxsize=256)
 def _looks_mojibake(s: str) -> bool:
-    return any(ch in s for ch in _BAD_HINTS)
+    return _BAD_RE.search(s) is not None
 
+@functools.lru_cache(maxsize=256)
 def _port_display(orig: str) -> str:
     """
     Human-friendly display string (healed if possible).
@@ -114,7 +211,7 @@ def _port_display(orig: str) -> str:
         fixes = _variants_from_mojibake(orig)
         # Prefer CJK/Kana variant
         for f in fixes:
-            if any(('\u3040' <= ch <= '\u30ff') or ('\u4e00' <= ch <= '\u9fff') for ch in f):
+            if _CJK_RE.search(f):
                 return f
         if fixes:
             return fixes[0]
@@ -128,7 +225,7 @@ def _record_for_port(orig: str) -> dict:
     - 'nrms' : normalized strings (orig + alts) for matching
     - 'disp' : healed display
     """
-    alts = _variants_from_mojibake(orig) if _looks_mojibake(orig) else []
+    alts = list(_variants_from_mojibake(orig)) if _looks_mojibake(orig) else []
     nrms = {_norm(orig)}
     for a in alts:
         nrms.add(_norm(a))
@@ -151,32 +248,82 @@ def _filter_by_regex(recs: list[dict], pattern: str) -> list[dict]:
     return [r for r in recs if any(rx.search(n) for n in r["nrms"])]
 
 # ---------- Config ----------
+def _read_config_cache(key: tuple) -> dict | None:
+    """Return the cached config if its (mtime_ns, size) key matches; else None."""
+    try:
+        fd = os.open(CONFIG_CACHE_PATH, os.O_RDONLY | os.O_NOFOLLOW)  # never via a symlink
+        with open(fd, "rb") as f:
+            cached_key, cfg = pickle.load(f)
+    except Exception:
+        return None
+    if cached_key != key or not isinstance(cfg, dict):
+        return None
+    return cfg
+
+def _write_config_cache(key: tuple, cfg: dict):
+    """Best-effort write of the parsed config (atomic replace; errors ignored)."""
+    tmp = f"{CONFIG_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        # fresh owner-only file; O_EXCL|O_NOFOLLOW never writes through a symlink
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+    except Exception as e:
+        _debug(f"Config cache write failed: {e}")
+        return
+    try:
+        with open(fd, "wb") as f:
+            pickle.dump((key, cfg), f, protocol=5)
+        os.replace(tmp, CONFIG_CACHE_PATH)
+    except Exception as e:
+        _debug(f"Config cache write failed: {e}")
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+
 def _load_config() -> dict:
     """Load config.yaml; exit with helpful STDERR if missing or invalid."""
+    try:
+        st = os.stat(CONFIG_PATH)
+    except FileNotFoundError:
+        st = None
+    if st is not None:
+        key = (st.st_mtime_ns, st.st_size)
+        cfg = _read_config_cache(key)
+        if cfg is not None:
+            return cfg
+
     # lazy import
     import yaml
     try:
         with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or {}
+            # libyaml-backed loader when available (same YAMLError semantics)
+            cfg = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
     except FileNotFoundError:
         _error(f"config.yaml not found at: {CONFIG_PATH}")
         _info("Hint: create config.yaml (same folder as server.py). See config.sample.yaml.")
         _info("Available ports:")
-        for i, p in enumerate(_list_ports()):
+        for i, p in enumerate(_ports()):
             _info(f"  {i}: {_port_display(p)}")
         sys.exit(2)
     except yaml.YAMLError as e:
         _error(f"Invalid YAML in config.yaml: {e}")
         sys.exit(2)
 
-def _resolve_port(cfg: dict) -> tuple[str | None, list[str], list[str]]:
+    if st is not None and isinstance(cfg, dict):
+        _write_config_cache((st.st_mtime_ns, st.st_size), cfg)
+    return cfg
+
+def _resolve_port(cfg: dict) -> tuple[str | None, int | None, list[str], list[str]]:
     """
-    Returns (resolved_raw_name or None, matched_display_lines, all_display_lines).
+    Returns (resolved_raw_name or None, port_index or None, matched_display_lines, all_display_lines).
+    - port_index is the position in the enumerated port list (passed to open_port).
     - Matching uses normalized (NFKC+casefold) forms of both original and healed variants.
     - Display shows healed-only names.
     """
-    ports = _list_ports()
+    ports = _ports()
     recs = [_record_for_port(p) for p in ports]
+    for i, r in enumerate(recs):
+        r["idx"] = i
 
     midi_cfg = (cfg.get("midi") or {})
     dev_cfg  = (midi_cfg.get("device") or {})
@@ -199,8 +346,8 @@ def _resolve_port(cfg: dict) -> tuple[str | None, list[str], list[str]]:
 
     matched = recs2
     if len(matched) == 1:
-        return matched[0]["orig"], [matched[0]["disp"]], [r["disp"] for r in recs]
-    return None, [r["disp"] for r in matched], [r["disp"] for r in recs]
+        return matched[0]["orig"], matched[0]["idx"], [matched[0]["disp"]], [r["disp"] for r in recs]
+    return None, None, [r["disp"] for r in matched], [r["disp"] for r in recs]
 
 def _channel_from_config(cfg: dict) -> int:
     midi_cfg = (cfg.get("midi") or {})
@@ -211,17 +358,27 @@ def _channel_from_config(cfg: dict) -> int:
     return 1 if ch < 1 else (16 if ch > 16 else ch)
 
 # ---------- MIDI open/close ----------
-def _open_midi_out(port_name: str) -> bool:
+def _open_midi_out(port_name: str, idx: int) -> bool:
+    """
+    Open MIDI OUT by the index `_resolve_port` found.
+    The index is trusted only if it still names `port_name` (ports may have
+    changed since enumeration); otherwise fall back to a search by name.
+    """
     # lazy import
     import rtmidi
     global _MIDIOUT
     m = None
     try:
         m = rtmidi.MidiOut()
-        ports = m.get_ports()
-        idx = next((i for i, p in enumerate(ports) if p == port_name), None)
-        if idx is None:
-            return False
+        try:
+            current = m.get_port_name(idx)  # None / error if idx is gone
+        except Exception:
+            current = None
+        if current != port_name:
+            ports = m.get_ports()
+            idx = next((i for i, p in enumerate(ports) if p == port_name), None)
+            if idx is None:
+                return False
         m.open_port(idx)
         _MIDIOUT = m
         _debug(f'Opened MIDI OUT index={idx}')
@@ -246,20 +403,70 @@ def _close_midi_out():
         _MIDIOUT = None
 
 # ---------- Sending ----------
+def _build_note_messages():
+    """Precompute immutable Note On/Off messages for the current status bytes."""
+    global _NOTE_ON_MSG, _NOTE_OFF_MSG
+    _NOTE_ON_MSG = [bytes((_STATUS_ON, n, 127)) for n in range(128)]
+    _NOTE_OFF_MSG = [bytes((_STATUS_OFF, n, 0)) for n in range(128)]
+
+def _note_off_loop():
+    """Timer thread: send each queued Note Off when it falls due."""
+    while True:
+        item = None
+        with _OFF_LOCK:
+            if _OFF_HEAP:
+                delay = _OFF_HEAP[0][0] - time.monotonic()
+                if delay <= 0:
+                    item = heapq.heappop(_OFF_HEAP)
+            else:
+                delay = None
+            if item is None:
+                _OFF_WAKE.clear()
+        if item is None:
+            _OFF_WAKE.wait(delay)
+            continue
+
+        _, n = item
+        if _MIDIOUT is None:
+            continue
+        try:
+            _MIDIOUT.send_message(_NOTE_OFF_MSG[n])
+        except Exception as e:
+            _warn(f"Failed to send Note Off ({n}): {e}")
+            _close_midi_out()
+
+def _start_note_off_timer():
+    threading.Thread(target=_note_off_loop, daemon=True).start()
+
+def _flush_note_offs():
+    """Send all pending Note Offs now (used before closing the port)."""
+    with _OFF_LOCK:
+        pending = sorted(_OFF_HEAP)
+        _OFF_HEAP.clear()
+    for _, n in pending:
+        if _MIDIOUT is None:
+            return
+        try:
+            _MIDIOUT.send_message(_NOTE_OFF_MSG[n])
+        except Exception:
+            return
+
 def _send_note(note_name: str):
-    """Send a short Note On/Off pulse for a single note name (strict map)."""
-    n = NOTE_TO_NUM.get(note_name)
+    """Send Note On now and schedule its Note Off after the gate time (strict map)."""
+    n = _note_number(note_name)
     if n is None or _MIDIOUT is None:
-        if n is None:
+        if n is None and _DEBUG:  # hot path: skip formatting unless enabled
             _debug(f"Ignored token (not a note): {note_name!r}")
         return
     try:
-        _MIDIOUT.send_message([_STATUS_ON, n, 127])
-        time.sleep(0.05)
-        _MIDIOUT.send_message([_STATUS_OFF, n, 0])
+        _MIDIOUT.send_message(_NOTE_ON_MSG[n])
     except Exception as e:
         _warn(f"Failed to send note '{note_name}': {e}")
         _close_midi_out()
+        return
+    with _OFF_LOCK:
+        heapq.heappush(_OFF_HEAP, (time.monotonic() + _GATE_SEC, n))
+    _OFF_WAKE.set()
 
 # ---------- Socket hardening ----------
 def _abort_if_sock_symlink():
@@ -273,27 +480,145 @@ def _abort_if_sock_symlink():
         sys.exit(1)
 
 # ---------- Socket helpers ----------
-def _ensure_singleton_sock_or_exit():
-    """Remove stale socket; exit if another instance is alive."""
-    _abort_if_sock_symlink()
-    if os.path.exists(SOCK_PATH):
+def _sock_is_alive() -> bool:
+    """Probe SOCK_PATH with both socket types (a server may run either)."""
+    for sock_type in (socket.SOCK_DGRAM, socket.SOCK_STREAM):
+        test = socket.socket(socket.AF_UNIX, sock_type)
         try:
-            test = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             test.settimeout(0.2)
             test.connect(SOCK_PATH)   # alive -> another instance
+            return True
+        except OSError as e:
+            if e.errno != errno.EPROTOTYPE:
+                return False          # refused / timeout -> stale
+            # wrong socket type for the bound server -> try the other one
+        finally:
             test.close()
+    return False
+
+def _acquire_instance_lock() -> bool | None:
+    """
+    Take an exclusive flock on LOCK_PATH (kept until the process exits).
+    Returns True if held, False if another instance holds it,
+    None if locking is unavailable (the socket probe still applies).
+    """
+    global _LOCK_FD
+    if _LOCK_FD is not None:
+        return True
+    try:
+        import fcntl
+        fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    except Exception as e:
+        _debug(f"Lockfile unavailable: {e}")
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    except Exception as e:
+        _debug(f"flock failed: {e}")
+        os.close(fd)
+        return None
+    _LOCK_FD = fd
+    return True
+
+def _ensure_singleton_sock_or_exit():
+    """Remove stale socket; exit if another instance is alive."""
+    _abort_if_sock_symlink()
+    locked = _acquire_instance_lock()
+    if locked is False:
+        sys.exit(0)
+    if os.path.exists(SOCK_PATH):
+        # Probe even with the lock held: an instance predating the lockfile
+        # holds no lock. A stale socket is refused at once (no timeout).
+        if _sock_is_alive():
             sys.exit(0)
+        try:
+            os.remove(SOCK_PATH)  # stale -> remove
         except Exception:
-            try:
-                os.remove(SOCK_PATH)  # stale -> remove
-            except Exception:
-                pass
+            pass
+
+def _handle_line(data: bytes):
+    """Send the notes on one received line."""
+    try:
+        text = data.decode("utf-8", errors="ignore").strip()
+        # One or more notes (whitespace/commas), sent in order
+        tokens = text.split() if "," not in text else _TOK_RE.split(text)
+        for token in tokens:
+            if token:
+                _send_note(token)
+    except Exception:
+        # Ignore malformed inputs
+        pass
 
-def _socket_server():
-    """UNIX socket server: single-line note name per connection."""
+def _accept_all(s: socket.socket, sel: selectors.BaseSelector):
+    """Accept every pending connection and watch it for input."""
+    while True:
+        try:
+            conn, _ = s.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except Exception:
+            time.sleep(0.05)  # e.g. EMFILE; avoid a busy loop
+            return
+        try:
+            conn.setblocking(False)
+            sel.register(conn, selectors.EVENT_READ, bytearray())
+        except Exception as e:
+            _debug(f"Failed to register connection: {e}")
+            conn.close()
+
+def _read_conn(conn: socket.socket, buf: bytearray, sel: selectors.BaseSelector):
+    """Handle each complete line; close on EOF (flushing an unterminated last line)."""
+    try:
+        data = conn.recv(4096)
+    except (BlockingIOError, InterruptedError):
+        return
+    except Exception:
+        data = b""
+
+    if data:
+        buf += data
+        while (i := buf.find(b"\n")) >= 0:
+            _handle_line(bytes(buf[:i]))
+            del buf[:i + 1]
+        if len(buf) <= _MAX_LINE:
+            return  # keep the connection open for more lines
+        _debug("Line too long; dropping client")
+    elif buf:
+        _handle_line(bytes(buf))
+
+    sel.unregister(conn)
+    conn.close()
+
+def _read_dgrams(s: socket.socket):
+    """Handle the lines of every pending datagram (one message per sendto)."""
+    while True:
+        try:
+            data, _, flags, _ = s.recvmsg(_MAX_LINE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except Exception:
+            time.sleep(0.05)  # avoid a busy loop on persistent errors
+            return
+        if flags & socket.MSG_TRUNC:
+            # Over _MAX_LINE: the cut-off tail could parse as a different note
+            _debug("Datagram too long; dropped")
+            continue
+        for line in data.split(b"\n"):
+            if line:
+                _handle_line(line)
+
+def _open_socket_server() -> tuple[socket.socket, selectors.BaseSelector]:
+    """
+    Bind the UNIX socket server: newline-framed lines of note names.
+    - SOCK_DGRAM (default): one or more lines per datagram, no connection state.
+    - SOCK_STREAM (`--stream`): lines per connection (legacy clients).
+    """
     _ensure_singleton_sock_or_exit()
 
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s = socket.socket(socket.AF_UNIX, _SOCK_TYPE)
     try:
         _abort_if_sock_symlink()  # double-check just before bind
         s.bind(SOCK_PATH)
@@ -302,60 +627,59 @@ def _socket_server():
         _error(f"Failed to bind socket: {e}")
         sys.exit(1)
 
-    s.listen(8)
+    if _SOCK_TYPE == socket.SOCK_STREAM:
+        s.listen(8)
+    s.setblocking(False)
 
+    # kqueue on macOS (epoll/poll elsewhere); idle clients cost nothing here
+    sel = selectors.DefaultSelector()
+    sel.register(s, selectors.EVENT_READ)
+    return s, sel
+
+def _serve_socket(s: socket.socket, sel: selectors.BaseSelector):
+    """
+    Server thread: block in select and handle lines inline (no worker thread).
+    Runs off the Cocoa runloop so notes keep flowing while the menu is open.
+    """
     while True:
         try:
-            # Blocking accept is fine for a daemon thread.
-            conn, _ = s.accept()
+            events = sel.select()
         except Exception:
             # Do NOT exit the loop; transient errors can happen.
             time.sleep(0.05)
             continue
 
-        with conn:
-            # Drop half-open clients quickly (no data sent).
-            try:
-                conn.settimeout(1.0)  # seconds
-            except (OSError, ValueError, TypeError) as e:
-                _debug(f"conn.settimeout failed: {e}")  # silent unless MIDISOCK_DEBUG=1
+        for key, _ in events:
+            if key.fileobj is s:
+                if _SOCK_TYPE == socket.SOCK_DGRAM:
+                    _read_dgrams(s)
+                else:
+                    _accept_all(s, sel)
+            else:
+                _read_conn(key.fileobj, key.data, sel)
 
-            try:
-                data = conn.recv(1024)
-            except socket.timeout:
-                # No payload within timeout → ignore this client.
-                continue
-            except Exception:
-                continue
+# ---------- rumps App ----------
+def _app_class():
+    """Build the menubar App class (lazy import: rumps pulls in PyObjC)."""
+    import rumps
 
-            if not data:
-                continue
+    class MIDISockApp(rumps.App):
+        def __init__(self, title="🎛 MIDISock"):
+            super().__init__(title, quit_button=None)
+            self.menu = ["Quit"]
 
+        @rumps.clicked("Quit")
+        def _quit(self, _):
             try:
-                text = data.decode("utf-8", errors="ignore").strip()
-                # Single note only: first token (whitespace/commas)
-                token = re.split(r"[,\s]+", text)[0] if text else ""
-                if token:
-                    _send_note(token)
+                if os.path.exists(SOCK_PATH):
+                    os.remove(SOCK_PATH)
             except Exception:
-                # Ignore malformed inputs
                 pass
+            _flush_note_offs()
+            _close_midi_out()
+            rumps.quit_application()
 
-# ---------- rumps App ----------
-class MIDISockApp(rumps.App):
-    def __init__(self, title="🎛 MIDISock"):
-        super().__init__(title, quit_button=None)
-        self.menu = ["Quit"]
-
-    @rumps.clicked("Quit")
-    def _quit(self, _):
-        try:
-            if os.path.exists(SOCK_PATH):
-                os.remove(SOCK_PATH)
-        except Exception:
-            pass
-        _close_midi_out()
-        rumps.quit_application()
+    return MIDISockApp
 
 # ---------- Selection error (detailed) ----------
 def _exit_with_selection_error(matched_disps: list[str], all_disps: list[str], check_mode: bool):
@@ -382,12 +706,18 @@ def main():
 
     check_mode = ("--check" in sys.argv)
 
+    global _SOCK_TYPE
+    if "--stream" in sys.argv:
+        _SOCK_TYPE = socket.SOCK_STREAM
+
     # Early singleton guard: prevent duplicate servers (skip for utility modes)
     if not check_mode:
         _ensure_singleton_sock_or_exit()
 
+    # CoreMIDI enumeration runs while config.yaml is read/parsed
+    _prefetch_ports()
     cfg = _load_config()
-    port_name, matched_disps, all_disps = _resolve_port(cfg)
+    port_name, port_idx, matched_disps, all_disps = _resolve_port(cfg)
     if port_name is None:
         _exit_with_selection_error(matched_disps, all_disps, check_mode)
 
@@ -396,6 +726,7 @@ def main():
     global _STATUS_ON, _STATUS_OFF
     _STATUS_ON  = 0x90 + (ch - 1)
     _STATUS_OFF = 0x80 + (ch - 1)
+    _build_note_messages()
 
     if check_mode:
         # Healed name only (no mojibake leak)
@@ -403,16 +734,17 @@ def main():
         sys.exit(0)
 
     # Open MIDI OUT now (fail early)
-    if not _open_midi_out(port_name):
+    if not _open_midi_out(port_name, port_idx):
         _error(f'Failed to open MIDI OUT port: "{_port_display(port_name)}"')
         sys.exit(1)
 
-    # Start socket server
-    t = threading.Thread(target=_socket_server, daemon=True)
-    t.start()
+    # Bind socket server (fail early), start Note Off timer & server thread
+    server = _open_socket_server()
+    _start_note_off_timer()
+    threading.Thread(target=_serve_socket, args=server, daemon=True).start()
 
     # Run menubar app
-    MIDISockApp().run()
+    _app_class()().run()
 
 if __name__ == "__main__":
     main()